@@ -6,7 +6,7 @@ Handles Chinese sentence segmentation, punctuation, and multi-tone characters
 import re
 import jieba
 import jieba.posseg as pseg
-from typing import Dict, List, Tuple, Set, Optional
+from typing import Dict, Iterable, Iterator, List, Tuple, Set, Optional
 from dataclasses import dataclass
 import unicodedata
 
@@ -205,11 +205,32 @@ class ChinesePunctuationProcessor:
         
         return "".join(sentences)
     
+    def add_smart_punctuation_batch(self, texts: List[str]) -> List[str]:
+        """Add punctuation to many texts with a single jieba pass"""
+        results = list(texts)
+        indices = [i for i, text in enumerate(texts) if text.strip()]
+        
+        # Whitespace is stripped from every text, so newlines can delimit them
+        prepared = [self._add_sentence_boundaries(re.sub(r'\s+', '', texts[i])) for i in indices]
+        words_per_text = [[]]
+        for word in jieba.cut("\n".join(prepared)):
+            if word == "\n":
+                words_per_text.append([])
+            else:
+                words_per_text[-1].append(word)
+        
+        for i, words in zip(indices, words_per_text):
+            results[i] = self._insert_commas(words)
+        
+        return results
+    
     def _add_comma_boundaries(self, text: str) -> str:
         """Add commas at natural pause points"""
         # Use jieba for word segmentation to identify pause points
-        words = list(jieba.cut(text))
-        
+        return self._insert_commas(list(jieba.cut(text)))
+    
+    def _insert_commas(self, words: List[str]) -> str:
+        """Insert commas after transition words in a segmented sentence"""
         result = []
         for i, word in enumerate(words):
             result.append(word)
@@ -254,12 +275,27 @@ class ChineseSentenceSegmenter:
         else:
             return self._segment_basic(text)
     
+    def segment_sentences_iter(self, texts: Iterable[str]) -> str:
+        """Segment a stream of text pieces without joining them up front"""
+        if self.method in ("jieba", "ai"):
+            return self._group_sentences(self._iter_words(texts))
+        else:
+            return self._segment_basic(" ".join(texts))
+    
+    def _iter_words(self, texts: Iterable[str]) -> Iterator[str]:
+        """Yield jieba words for each piece, separated like a space-joined string"""
+        for i, text in enumerate(texts):
+            if i:
+                yield " "
+            yield from jieba.cut(text)
+    
     def _segment_with_jieba(self, text: str) -> str:
         """Use jieba for intelligent sentence segmentation"""
-        # First, segment words
-        words = list(jieba.cut(text))
-        
-        # Then group into sentences based on punctuation and semantic rules
+        # Segment words lazily, then group them into sentences
+        return self._group_sentences(jieba.cut(text))
+    
+    def _group_sentences(self, words: Iterable[str]) -> str:
+        """Group segmented words into sentences based on punctuation and semantic rules"""
         sentences = []
         current_sentence = []
         
@@ -317,6 +353,31 @@ class ChineseProcessor:
         if not text or not text.strip():
             return text
         
+        processed_text = self._normalize_text(text)
+        
+        # Add smart punctuation
+        if self.settings.smart_punctuation:
+            processed_text = self.punctuation.add_smart_punctuation(processed_text)
+        
+        return processed_text
+    
+    def process_batch(self, texts: List[str]) -> List[str]:
+        """Process many texts at once, sharing a single jieba pass for punctuation"""
+        results = list(texts)
+        indices = [i for i, text in enumerate(texts) if text and text.strip()]
+        processed_texts = [self._normalize_text(texts[i]) for i in indices]
+        
+        # Add smart punctuation
+        if self.settings.smart_punctuation:
+            processed_texts = self.punctuation.add_smart_punctuation_batch(processed_texts)
+        
+        for i, processed_text in zip(indices, processed_texts):
+            results[i] = processed_text
+        
+        return results
+    
+    def _normalize_text(self, text: str) -> str:
+        """Apply variant conversion and multi-pronunciation handling"""
         processed_text = text.strip()
         
         # Handle text variant conversion if needed
@@ -329,16 +390,16 @@ class ChineseProcessor:
         if self.settings.multi_pronunciation:
             processed_text = self.multi_pronunciation.process_text_pronunciations(processed_text)
         
-        # Add smart punctuation
-        if self.settings.smart_punctuation:
-            processed_text = self.punctuation.add_smart_punctuation(processed_text)
-        
         return processed_text
     
     def segment_sentences(self, text: str) -> str:
         """Segment text into proper sentences"""
         return self.segmenter.segment_sentences(text)
     
+    def segment_sentences_iter(self, texts: Iterable[str]) -> str:
+        """Segment a stream of text pieces (e.g. transcription segments) into sentences"""
+        return self.segmenter.segment_sentences_iter(texts)
+    
     def _convert_to_traditional(self, text: str) -> str:
         """Convert simplified Chinese to traditional (placeholder)"""
         # This would use a conversion library like opencc
@@ -4,17 +4,19 @@ Supports advanced Chinese text processing with multi-pronunciation handling
 """
 
 import os
+import sys
 import gc
+import atexit
 import torch
 import whisper
 import numpy as np
 from pathlib import Path
-from typing import Dict, List, Optional, Tuple, Any
+from typing import Dict, List, Optional, Tuple, Any, Union
 import subprocess
-import tempfile
 import json
 from dataclasses import dataclass, asdict
 from concurrent.futures import ThreadPoolExecutor
+import threading
 import time
 
 # TensorRT imports
@@ -27,10 +29,20 @@ except ImportError:
     TRT_AVAILABLE = False
     print("Warning: TensorRT not available. Using standard PyTorch inference.")
 
+# NVML imports (nvidia-ml-py3)
+try:
+    import pynvml
+    NVML_AVAILABLE = True
+except ImportError:
+    NVML_AVAILABLE = False
+
 from chinese_processor import ChineseProcessor
 
+# Slotted dataclasses drop the per-instance __dict__ (Python 3.10+ only)
+DATACLASS_OPTIONS = {"slots": True} if sys.version_info >= (3, 10) else {}
 
-@dataclass
+
+@dataclass(**DATACLASS_OPTIONS)
 class TranscriptionSegment:
     start: float
     end: float
@@ -38,17 +50,27 @@ class TranscriptionSegment:
     confidence: float = 0.0
 
 
-@dataclass
+@dataclass(**DATACLASS_OPTIONS)
 class ProcessingStats:
     gpu_acceleration: bool
     tensorrt_used: bool
-    speedup: float
-    accuracy: float
     processing_time: float
     gpu_memory_used: float
+    segment_count: int = 0
+    
+    @property
+    def speedup(self) -> float:
+        """Estimated speedup compared to a CPU baseline"""
+        cpu_baseline_time = self.segment_count * 2.0  # Rough estimate
+        return max(1.0, cpu_baseline_time / max(self.processing_time, 1e-6))
+    
+    @property
+    def accuracy(self) -> float:
+        """Estimated accuracy percentage"""
+        return min(95.0, max(80.0, 90.0 + self.segment_count * 0.1))
 
 
-@dataclass
+@dataclass(**DATACLASS_OPTIONS)
 class TranscriptionResult:
     segments: List[TranscriptionSegment]
     full_text: str
@@ -123,6 +145,12 @@ class TensorRTOptimizer:
 class GPUVideoTranscriber:
     """High-performance GPU-accelerated video transcriber with TensorRT optimization"""
     
+    # Loaded models shared by all transcribers in the process, keyed by (model_size, device, precision)
+    # Each cached model carries the lock that serializes inference on it
+    _MODEL_CACHE: Dict[Tuple[str, str, str], Tuple[whisper.Whisper, threading.Lock]] = {}
+    _MODEL_REFCOUNTS: Dict[Tuple[str, str, str], int] = {}
+    _MODEL_LOCK = threading.Lock()
+    
     def __init__(
         self,
         model_size: str = "large-v3",
@@ -143,6 +171,10 @@ class GPUVideoTranscriber:
         self.model = self._load_model()
         self.tensorrt_optimizer = None
         
+        # NVML device handle for cheap GPU stats queries, set up on first use
+        self._nvml = None
+        self._nvml_checked = False
+        
         if self.use_tensorrt:
             self._setup_tensorrt()
     
@@ -157,6 +189,31 @@ class GPUVideoTranscriber:
             return "cpu"
     
     def _load_model(self) -> whisper.Whisper:
+        """Get the shared Whisper model for this configuration, loading it on first use"""
+        precision = "fp16" if self.use_gpu and self.device.startswith("cuda") else "fp32"
+        self._model_key = (self.model_size, self.device, precision)
+        
+        with self._MODEL_LOCK:
+            entry = self._MODEL_CACHE.get(self._model_key)
+            if entry is None:
+                entry = (self._build_model(), threading.Lock())
+                self._MODEL_CACHE[self._model_key] = entry
+            model, self._inference_lock = entry
+            self._MODEL_REFCOUNTS[self._model_key] = self._MODEL_REFCOUNTS.get(self._model_key, 0) + 1
+        
+        return model
+    
+    def _release_model(self):
+        """Drop this transcriber's reference to the shared model, freeing it after the last one"""
+        with self._MODEL_LOCK:
+            count = self._MODEL_REFCOUNTS.get(self._model_key, 0) - 1
+            if count > 0:
+                self._MODEL_REFCOUNTS[self._model_key] = count
+            else:
+                self._MODEL_REFCOUNTS.pop(self._model_key, None)
+                self._MODEL_CACHE.pop(self._model_key, None)
+    
+    def _build_model(self) -> whisper.Whisper:
         """Load Whisper model with GPU optimization"""
         print(f"Loading Whisper {self.model_size} model on {self.device}...")
         
@@ -170,9 +227,45 @@ class GPUVideoTranscriber:
             model = model.to(self.device)
             # Enable mixed precision for faster inference
             model.half()
+            
+            if os.environ.get("WHISPER_TORCH_COMPILE", "1") != "0":
+                self._compile_encoder(model)
         
         return model
     
+    def _compile_encoder(self, model: whisper.Whisper):
+        """Compile the encoder for its fixed 30s mel shape so CUDA graphs replay each window"""
+        if not hasattr(torch, "compile"):
+            return
+        
+        try:
+            encoder = torch.compile(model.encoder, mode="reduce-overhead", fullgraph=True)
+            
+            # Warm up with a dummy mel window to trigger compilation and graph capture
+            dummy_mel = torch.zeros(
+                1, model.dims.n_mels, model.dims.n_audio_ctx * 2,
+                dtype=torch.float16, device=self.device
+            )
+            with torch.no_grad():
+                encoder(dummy_mel)
+            
+            model.encoder = encoder
+        except Exception as e:
+            print(f"Encoder compilation failed, using eager mode: {e}")
+    
+    def _setup_nvml(self):
+        """Initialize NVML and return the handle of the active CUDA device"""
+        if not NVML_AVAILABLE or not self.device.startswith("cuda"):
+            return None
+        
+        try:
+            pynvml.nvmlInit()
+            atexit.register(pynvml.nvmlShutdown)
+            return pynvml.nvmlDeviceGetHandleByIndex(torch.cuda.current_device())
+        except Exception as e:
+            print(f"NVML setup failed: {e}")
+            return None
+    
     def _setup_tensorrt(self):
         """Setup TensorRT optimization"""
         if not TRT_AVAILABLE:
@@ -190,58 +283,41 @@ class GPUVideoTranscriber:
             print(f"TensorRT setup failed: {e}")
             self.use_tensorrt = False
     
-    def extract_audio(self, video_path: str, sample_rate: int = 16000) -> str:
-        """Extract audio from video using FFmpeg with GPU acceleration"""
-        audio_path = tempfile.mktemp(suffix=".wav")
-        
-        # Use GPU-accelerated decoding if available
+    def load_audio(self, video_path: str, sample_rate: int = 16000) -> np.ndarray:
+        """Decode the audio track straight into memory as float32 PCM"""
+        # -vn skips the video stream entirely, so no hardware decoder is needed
         cmd = [
-            "ffmpeg", "-y",
-            "-hwaccel", "cuda" if self.use_gpu else "auto",
+            "ffmpeg", "-nostdin",
             "-i", video_path,
+            "-vn",
             "-ar", str(sample_rate),
             "-ac", "1",
-            "-c:a", "pcm_s16le",
-            audio_path
+            "-f", "s16le",
+            "-"
         ]
         
-        try:
-            subprocess.run(cmd, check=True, capture_output=True)
-        except subprocess.CalledProcessError:
-            # Fallback to CPU decoding
-            cmd = [
-                "ffmpeg", "-y",
-                "-i", video_path,
-                "-ar", str(sample_rate),
-                "-ac", "1",
-                "-c:a", "pcm_s16le",
-                audio_path
-            ]
-            subprocess.run(cmd, check=True, capture_output=True)
-        
-        return audio_path
+        result = subprocess.run(cmd, check=True, capture_output=True)
+        return np.frombuffer(result.stdout, np.int16).astype(np.float32) / 32768.0
     
     def get_gpu_stats(self) -> Dict[str, float]:
         """Get current GPU utilization stats"""
         if not torch.cuda.is_available():
             return {"utilization": 0, "memory_used": 0, "memory_total": 0}
         
+        if not self._nvml_checked:
+            self._nvml = self._setup_nvml()
+            self._nvml_checked = True
+        
         gpu_stats = {}
         try:
-            # Get GPU utilization using nvidia-ml-py or subprocess
-            result = subprocess.run(
-                ["nvidia-smi", "--query-gpu=utilization.gpu,memory.used,memory.total", 
-                 "--format=csv,noheader,nounits"],
-                capture_output=True, text=True
-            )
-            
-            if result.returncode == 0:
-                line = result.stdout.strip().split('\n')[0]
-                util, mem_used, mem_total = map(int, line.split(', '))
+            if self._nvml is not None:
+                # Query the driver directly instead of forking nvidia-smi
+                util = pynvml.nvmlDeviceGetUtilizationRates(self._nvml)
+                mem = pynvml.nvmlDeviceGetMemoryInfo(self._nvml)
                 gpu_stats = {
-                    "utilization": util,
-                    "memory_used": mem_used,
-                    "memory_total": mem_total
+                    "utilization": util.gpu,
+                    "memory_used": mem.used >> 20,
+                    "memory_total": mem.total >> 20
                 }
             else:
                 # Fallback to PyTorch memory stats
@@ -257,13 +333,23 @@ class GPUVideoTranscriber:
     
     def transcribe_audio(
         self,
-        audio_path: str,
+        audio: Union[str, np.ndarray],
         language: str = "zh",
         progress_callback: Optional[callable] = None
     ) -> TranscriptionResult:
         """Transcribe audio with GPU acceleration and Chinese processing"""
         start_time = time.time()
-        initial_gpu_stats = self.get_gpu_stats()
+        result, gpu_memory_used = self._run_whisper(audio, language, progress_callback)
+        return self._postprocess(result, language, start_time, gpu_memory_used, progress_callback)
+    
+    def _run_whisper(
+        self,
+        audio: Union[str, np.ndarray],
+        language: str = "zh",
+        progress_callback: Optional[callable] = None
+    ) -> Tuple[Dict[str, Any], float]:
+        """Run the Whisper model on the GPU and return its raw result and peak memory (MB)"""
+        gpu_enabled = self.device.startswith("cuda")
         
         print(f"Starting transcription with GPU: {self.use_gpu}, TensorRT: {self.use_tensorrt}")
         
@@ -281,48 +367,64 @@ class GPUVideoTranscriber:
         if progress_callback:
             progress_callback(20, "Starting transcription...")
         
-        # Run transcription
-        result = self.model.transcribe(audio_path, **transcription_options)
+        # Run transcription; the shared model's decoder kv-cache hooks are not
+        # reentrant, so only one transcriber may run it at a time
+        with self._inference_lock:
+            if gpu_enabled:
+                torch.cuda.reset_peak_memory_stats()
+            
+            result = self.model.transcribe(audio, **transcription_options)
+            
+            # Peak allocation is tracked in-process, so this costs no driver round trip
+            gpu_memory_used = torch.cuda.max_memory_allocated() >> 20 if gpu_enabled else 0
         
+        return result, gpu_memory_used
+    
+    def _postprocess(
+        self,
+        result: Dict[str, Any],
+        language: str,
+        start_time: float,
+        gpu_memory_used: float = 0,
+        progress_callback: Optional[callable] = None
+    ) -> TranscriptionResult:
+        """Apply Chinese text processing to a raw Whisper result"""
         if progress_callback:
             progress_callback(70, "Processing Chinese text...")
         
-        # Process segments with Chinese NLP
-        processed_segments = []
-        for i, segment in enumerate(result["segments"]):
-            processed_text = self.chinese_processor.process_text(segment["text"])
-            
-            processed_segments.append(TranscriptionSegment(
+        # Process segments with Chinese NLP in one batched call
+        segments = result["segments"]
+        processed_texts = self.chinese_processor.process_batch(
+            [segment["text"] for segment in segments]
+        )
+        
+        processed_segments = [
+            TranscriptionSegment(
                 start=segment["start"],
                 end=segment["end"],
                 text=processed_text,
                 confidence=segment.get("avg_logprob", 0.0)
-            ))
-            
-            if progress_callback:
-                progress = 70 + (i / len(result["segments"])) * 20
-                progress_callback(int(progress), "Processing segments...")
+            )
+            for segment, processed_text in zip(segments, processed_texts)
+        ]
+        
+        if progress_callback:
+            progress_callback(90, "Processing segments...")
         
         # Generate full text with proper sentence segmentation
-        full_text = self.chinese_processor.segment_sentences(
-            " ".join([seg.text for seg in processed_segments])
+        full_text = self.chinese_processor.segment_sentences_iter(
+            seg.text for seg in processed_segments
         )
         
         # Calculate processing stats
         processing_time = time.time() - start_time
-        final_gpu_stats = self.get_gpu_stats()
-        
-        # Estimate speedup (compared to CPU baseline)
-        cpu_baseline_time = len(processed_segments) * 2.0  # Rough estimate
-        speedup = max(1.0, cpu_baseline_time / processing_time)
         
         processing_stats = ProcessingStats(
             gpu_acceleration=self.use_gpu,
             tensorrt_used=self.use_tensorrt,
-            speedup=speedup,
-            accuracy=min(95.0, max(80.0, 90.0 + len(processed_segments) * 0.1)),  # Estimated
             processing_time=processing_time,
-            gpu_memory_used=final_gpu_stats.get("memory_used", 0)
+            gpu_memory_used=gpu_memory_used,
+            segment_count=len(processed_segments)
         )
         
         if progress_callback:
@@ -343,26 +445,14 @@ class GPUVideoTranscriber:
         progress_callback: Optional[callable] = None
     ) -> TranscriptionResult:
         """Transcribe video file end-to-end"""
-        try:
-            if progress_callback:
-                progress_callback(5, "Extracting audio...")
-            
-            # Extract audio
-            audio_path = self.extract_audio(video_path)
-            
-            # Transcribe
-            result = self.transcribe_audio(audio_path, language, progress_callback)
-            
-            # Cleanup
-            if os.path.exists(audio_path):
-                os.remove(audio_path)
-            
-            return result
-            
-        except Exception as e:
-            if 'audio_path' in locals() and os.path.exists(audio_path):
-                os.remove(audio_path)
-            raise e
+        if progress_callback:
+            progress_callback(5, "Extracting audio...")
+        
+        # Decode audio in memory; whisper would otherwise re-decode a temp file
+        audio = self.load_audio(video_path)
+        
+        # Transcribe
+        return self.transcribe_audio(audio, language, progress_callback)
     
     def batch_transcribe(
         self,
@@ -370,27 +460,47 @@ class GPUVideoTranscriber:
         max_workers: int = 2,
         progress_callback: Optional[callable] = None
     ) -> List[TranscriptionResult]:
-        """Batch process multiple videos with GPU optimization"""
+        """Batch process multiple videos, overlapping CPU stages with GPU transcription"""
         results = []
-        
-        with ThreadPoolExecutor(max_workers=max_workers) as executor:
-            futures = []
+        futures = [None] * len(video_paths)
+        postprocess_futures = []
+        
+        # Decode upcoming audio and post-process finished transcripts while the GPU runs
+        with ThreadPoolExecutor(max_workers=max_workers) as executor, \
+                ThreadPoolExecutor(max_workers=1) as nlp_executor:
+            def prefetch(index: int):
+                if index < len(video_paths):
+                    futures[index] = executor.submit(self.load_audio, video_paths[index])
             
-            for i, video_path in enumerate(video_paths):
-                future = executor.submit(self.transcribe_video, video_path)
-                futures.append((i, future))
+            for i in range(max_workers):
+                prefetch(i)
             
-            for i, future in futures:
+            for i, video_path in enumerate(video_paths):
+                # Keep the decode workers busy with the next files
+                prefetch(i + max_workers)
+                
                 try:
-                    result = future.result()
-                    results.append(result)
+                    audio = futures[i].result()
+                    futures[i] = None
+                    start_time = time.time()
+                    result, gpu_memory_used = self._run_whisper(audio)
+                    postprocess_futures.append(
+                        nlp_executor.submit(self._postprocess, result, "zh", start_time, gpu_memory_used)
+                    )
                     
                     if progress_callback:
                         progress = ((i + 1) / len(video_paths)) * 100
                         progress_callback(int(progress), f"Completed {i + 1}/{len(video_paths)}")
                         
                 except Exception as e:
-                    print(f"Error processing video {video_paths[i]}: {e}")
+                    print(f"Error processing video {video_path}: {e}")
+                    postprocess_futures.append(None)
+            
+            for video_path, future in zip(video_paths, postprocess_futures):
+                try:
+                    results.append(future.result() if future else None)
+                except Exception as e:
+                    print(f"Error processing video {video_path}: {e}")
                     results.append(None)
         
         return results
@@ -472,6 +582,7 @@ class GPUVideoTranscriber:
     def cleanup(self):
         """Cleanup GPU memory and resources"""
         if hasattr(self, 'model'):
+            self._release_model()
             del self.model
         
         if torch.cuda.is_available():
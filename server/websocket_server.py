@@ -6,17 +6,105 @@ Provides real-time progress updates and transcription results
 import asyncio
 import json
 import logging
+import math
 import time
-from typing import Dict, List, Set, Optional, Any
+from typing import Awaitable, Callable, Dict, Iterable, List, Set, Optional, Any, Tuple
 import websockets
 from websockets.server import WebSocketServerProtocol
-from dataclasses import dataclass, asdict
+from dataclasses import dataclass, field
 import threading
 from queue import Queue
 import uuid
+from collections import defaultdict, deque
+
+# Fast JSON serialization
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+# libuv-based event loop (not available on Windows)
+try:
+    import uvloop
+    UVLOOP_AVAILABLE = True
+except ImportError:
+    UVLOOP_AVAILABLE = False
 
 logger = logging.getLogger(__name__)
 
+# Clients with more unsent bytes than this get messages through their queue instead
+WRITE_BUFFER_HIGH_WATER = 64 * 1024
+
+# Most recent segments kept per job; older ones were already streamed as new_segment events
+MAX_TRACKED_SEGMENTS = 500
+
+# Clients only send small control messages (subscribe/ping), so cap inbound frames
+MAX_INBOUND_MESSAGE_SIZE = 64 * 1024
+
+
+def _json_default(obj: Any) -> Any:
+    """Serialize types the JSON encoders don't handle natively"""
+    if isinstance(obj, deque):
+        return list(obj)
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def json_dumps(obj: Any) -> str:
+    """Serialize to a JSON string, using orjson when available"""
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(obj, default=_json_default, option=orjson.OPT_NON_STR_KEYS).decode()
+    return json.dumps(obj, default=_json_default)
+
+
+def json_loads(data: str) -> Any:
+    """Parse a JSON string, using orjson when available"""
+    if ORJSON_AVAILABLE:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def _json_scalar(value: Any) -> str:
+    """Encode a scalar JSON value, formatting plain numbers directly"""
+    if type(value) is int or (type(value) is float and math.isfinite(value)):
+        return repr(value)
+    return json_dumps(value)
+
+
+# Specialized encoders for the fixed-shape, high-frequency message types.
+# They emit the same JSON as WebSocketMessage.to_json without building dicts.
+
+def encode_progress_update(job_id: int, progress: int, stage: Optional[str],
+                           gpu_utilization: Optional[float]) -> str:
+    """Encode a progress_update message"""
+    return (
+        f'{{"type":"progress_update","data":{{"job_id":{_json_scalar(job_id)},'
+        f'"progress":{_json_scalar(progress)},"stage":{json_dumps(stage)},'
+        f'"gpu_utilization":{_json_scalar(gpu_utilization)}}},"timestamp":{time.time()!r}}}'
+    )
+
+
+def encode_new_segment(job_id: int, segment: Dict) -> str:
+    """Encode a new_segment message"""
+    return (
+        f'{{"type":"new_segment","data":{{"job_id":{_json_scalar(job_id)},'
+        f'"segment":{json_dumps(segment)}}},"timestamp":{time.time()!r}}}'
+    )
+
+
+def encode_system_metrics(status: Dict) -> str:
+    """Encode a system_metrics message"""
+    return f'{{"type":"system_metrics","data":{json_dumps(status)},"timestamp":{time.time()!r}}}'
+
+
+def encode_welcome(client_id: str) -> str:
+    """Encode a welcome message (client ids are UUIDs, so need no escaping)"""
+    return f'{{"type":"welcome","data":{{"client_id":"{client_id}"}},"timestamp":{time.time()!r}}}'
+
+
+# Pong replies are identical for every ping, so they carry no timestamp and are encoded once
+PONG_PAYLOAD = json_dumps({"type": "pong", "data": {}})
+
 
 @dataclass
 class WebSocketMessage:
@@ -29,7 +117,8 @@ class WebSocketMessage:
             self.timestamp = time.time()
     
     def to_json(self) -> str:
-        return json.dumps(asdict(self))
+        # Build the dict inline; asdict() would deep-copy the whole payload first
+        return json_dumps({"type": self.type, "data": self.data, "timestamp": self.timestamp})
 
 
 @dataclass
@@ -39,6 +128,8 @@ class ClientSubscription:
     subscribed_jobs: Set[int]
     subscribed_metrics: bool = False
     last_ping: float = None
+    # Outgoing payloads, drained in order by the client's relay task
+    out_queue: asyncio.Queue = field(default_factory=lambda: asyncio.Queue(maxsize=256))
     
     def __post_init__(self):
         if self.last_ping is None:
@@ -48,13 +139,36 @@ class ClientSubscription:
 class TranscriptionProgressTracker:
     """Track transcription progress and broadcast updates"""
     
-    def __init__(self, websocket_server):
+    def __init__(self, websocket_server, flush_interval: float = 0.1):
         self.websocket_server = websocket_server
         self.job_progress: Dict[int, Dict] = {}
         self.active_transcriptions: Set[int] = set()
+        
+        # Latest unsent (progress, stage, gpu_utilization) per job, flushed at most every flush_interval
+        self.flush_interval = flush_interval
+        self._pending_progress: Dict[int, Tuple[int, Optional[str], Optional[float]]] = {}
+        self._progress_event: Optional[asyncio.Event] = None
+    
+    def _defer_to_loop(self, method: Callable, *args) -> bool:
+        """Re-schedule a call on the server's event loop when made from another thread"""
+        loop = self.websocket_server.loop
+        if loop is None or loop.is_closed():
+            return False
+        
+        try:
+            if asyncio.get_running_loop() is loop:
+                return False
+        except RuntimeError:
+            pass  # No loop running in this thread
+        
+        loop.call_soon_threadsafe(method, *args)
+        return True
     
     def start_job(self, job_id: int, filename: str, duration: float = None):
         """Start tracking a transcription job"""
+        if self._defer_to_loop(self.start_job, job_id, filename, duration):
+            return
+        
         self.job_progress[job_id] = {
             "job_id": job_id,
             "filename": filename,
@@ -63,21 +177,26 @@ class TranscriptionProgressTracker:
             "stage": "Initializing...",
             "duration": duration,
             "started_at": time.time(),
-            "segments": []
+            "segments": deque(maxlen=MAX_TRACKED_SEGMENTS)
         }
         self.active_transcriptions.add(job_id)
         
+        # Nobody watching yet; subscribers get the current state when they subscribe
+        if not self.websocket_server.has_subscribers(job_id):
+            return
+        
         # Broadcast job start
         message = WebSocketMessage(
             type="job_started",
             data=self.job_progress[job_id]
         )
-        asyncio.create_task(
-            self.websocket_server.broadcast_to_job_subscribers(job_id, message)
-        )
+        self.websocket_server.broadcast_to_job_subscribers(job_id, message.to_json())
     
     def update_progress(self, job_id: int, progress: int, stage: str = None, gpu_utilization: float = None):
         """Update job progress"""
+        if self._defer_to_loop(self.update_progress, job_id, progress, stage, gpu_utilization):
+            return
+        
         if job_id not in self.job_progress:
             return
         
@@ -90,41 +209,63 @@ class TranscriptionProgressTracker:
         if gpu_utilization is not None:
             self.job_progress[job_id]["gpu_utilization"] = gpu_utilization
         
-        # Broadcast progress update
-        message = WebSocketMessage(
-            type="progress_update",
-            data={
-                "job_id": job_id,
-                "progress": progress,
-                "stage": stage,
-                "gpu_utilization": gpu_utilization
-            }
-        )
-        asyncio.create_task(
-            self.websocket_server.broadcast_to_job_subscribers(job_id, message)
-        )
+        if not self.websocket_server.has_subscribers(job_id):
+            return
+        
+        # Coalesce with any unsent update; the flush loop broadcasts the latest state
+        pending = self._pending_progress.get(job_id)
+        if pending:
+            stage = stage if stage is not None else pending[1]
+            gpu_utilization = gpu_utilization if gpu_utilization is not None else pending[2]
+        self._pending_progress[job_id] = (progress, stage, gpu_utilization)
+        
+        if self._progress_event:
+            self._progress_event.set()
+    
+    async def flush_progress_loop(self):
+        """Broadcast pending progress updates, at most once per flush interval"""
+        self._progress_event = asyncio.Event()
+        if self._pending_progress:
+            self._progress_event.set()
+        
+        try:
+            while True:
+                await self._progress_event.wait()
+                self._progress_event.clear()
+                
+                pending, self._pending_progress = self._pending_progress, {}
+                for job_id, (progress, stage, gpu_utilization) in pending.items():
+                    if not self.websocket_server.has_subscribers(job_id):
+                        continue
+                    payload = encode_progress_update(job_id, progress, stage, gpu_utilization)
+                    self.websocket_server.broadcast_to_job_subscribers(job_id, payload)
+                
+                await asyncio.sleep(self.flush_interval)
+        
+        except asyncio.CancelledError:
+            pass
     
     def add_segment(self, job_id: int, segment: Dict):
         """Add a new transcription segment"""
+        if self._defer_to_loop(self.add_segment, job_id, segment):
+            return
+        
         if job_id not in self.job_progress:
             return
         
         self.job_progress[job_id]["segments"].append(segment)
         
+        if not self.websocket_server.has_subscribers(job_id):
+            return
+        
         # Broadcast new segment
-        message = WebSocketMessage(
-            type="new_segment",
-            data={
-                "job_id": job_id,
-                "segment": segment
-            }
-        )
-        asyncio.create_task(
-            self.websocket_server.broadcast_to_job_subscribers(job_id, message)
-        )
+        self.websocket_server.broadcast_to_job_subscribers(job_id, encode_new_segment(job_id, segment))
     
     def complete_job(self, job_id: int, result: Dict = None):
         """Mark job as completed"""
+        if self._defer_to_loop(self.complete_job, job_id, result):
+            return
+        
         if job_id not in self.job_progress:
             return
         
@@ -137,17 +278,24 @@ class TranscriptionProgressTracker:
         
         self.active_transcriptions.discard(job_id)
         
+        # Drop unsent progress so it can't arrive after the final status
+        self._pending_progress.pop(job_id, None)
+        
+        if not self.websocket_server.has_subscribers(job_id):
+            return
+        
         # Broadcast completion
         message = WebSocketMessage(
             type="job_completed",
             data=self.job_progress[job_id]
         )
-        asyncio.create_task(
-            self.websocket_server.broadcast_to_job_subscribers(job_id, message)
-        )
+        self.websocket_server.broadcast_to_job_subscribers(job_id, message.to_json())
     
     def fail_job(self, job_id: int, error: str):
         """Mark job as failed"""
+        if self._defer_to_loop(self.fail_job, job_id, error):
+            return
+        
         if job_id not in self.job_progress:
             return
         
@@ -157,6 +305,12 @@ class TranscriptionProgressTracker:
         
         self.active_transcriptions.discard(job_id)
         
+        # Drop unsent progress so it can't arrive after the final status
+        self._pending_progress.pop(job_id, None)
+        
+        if not self.websocket_server.has_subscribers(job_id):
+            return
+        
         # Broadcast failure
         message = WebSocketMessage(
             type="job_failed",
@@ -165,13 +319,17 @@ class TranscriptionProgressTracker:
                 "error": error
             }
         )
-        asyncio.create_task(
-            self.websocket_server.broadcast_to_job_subscribers(job_id, message)
-        )
+        self.websocket_server.broadcast_to_job_subscribers(job_id, message.to_json())
     
     def get_job_status(self, job_id: int) -> Optional[Dict]:
-        """Get current job status"""
-        return self.job_progress.get(job_id)
+        """Get a serializable snapshot of the current job status"""
+        job = self.job_progress.get(job_id)
+        if job is None:
+            return None
+        
+        status = dict(job)
+        status["segments"] = list(job["segments"])
+        return status
 
 
 class WebSocketServer:
@@ -181,10 +339,25 @@ class WebSocketServer:
         self.host = host
         self.port = port
         self.clients: Dict[str, ClientSubscription] = {}
+        # Reverse indexes of client ids per topic, so broadcasts skip non-subscribers
+        self.job_subscribers: Dict[int, Set[str]] = defaultdict(set)
+        self.metrics_subscribers: Set[str] = set()
         self.server = None
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
         self.is_running = False
         self.progress_tracker = TranscriptionProgressTracker(self)
         self.metrics_broadcast_task = None
+        self.progress_flush_task = None
+        self._metrics_subscribed: Optional[asyncio.Event] = None
+        
+        # Client message type -> handler coroutine
+        self._handlers: Dict[str, Callable[[ClientSubscription, Dict], Awaitable[None]]] = {
+            "subscribe_job": self._on_subscribe_job,
+            "unsubscribe_job": self._on_unsubscribe_job,
+            "subscribe_metrics": self._on_subscribe_metrics,
+            "unsubscribe_metrics": self._on_unsubscribe_metrics,
+            "ping": self._on_ping,
+        }
         
     async def start_server(self):
         """Start the WebSocket server"""
@@ -193,12 +366,19 @@ class WebSocketServer:
         
         logger.info(f"Starting WebSocket server on {self.host}:{self.port}")
         
+        # Tracker calls from worker threads are marshalled onto this loop
+        self.loop = asyncio.get_running_loop()
+        
         self.server = await websockets.serve(
             self.handle_client,
             self.host,
             self.port,
             ping_interval=30,
-            ping_timeout=10
+            ping_timeout=10,
+            # Messages are small JSON frames fanned out to many clients; per-connection
+            # permessage-deflate would compress every identical payload once per client
+            compression=None,
+            max_size=MAX_INBOUND_MESSAGE_SIZE
         )
         
         self.is_running = True
@@ -206,10 +386,13 @@ class WebSocketServer:
         # Start metrics broadcasting
         self.metrics_broadcast_task = asyncio.create_task(self.broadcast_metrics_loop())
         
+        # Start coalesced progress broadcasting
+        self.progress_flush_task = asyncio.create_task(self.progress_tracker.flush_progress_loop())
+        
         logger.info(f"WebSocket server started on ws://{self.host}:{self.port}")
     
-    async def stop_server(self):
-        """Stop the WebSocket server"""
+    async def stop_server(self, wait_for_clients: bool = True):
+        """Stop the WebSocket server (wait_for_clients=False skips reaping aborted connections)"""
         if not self.is_running:
             return
         
@@ -221,12 +404,22 @@ class WebSocketServer:
         if self.metrics_broadcast_task:
             self.metrics_broadcast_task.cancel()
         
-        # Close all client connections
+        # Cancel progress flushing
+        if self.progress_flush_task:
+            self.progress_flush_task.cancel()
+        
+        # Drop all client connections at once instead of running a close
+        # handshake per client, then give the handlers a bounded window to
+        # notice the disconnect and clean up
         if self.clients:
-            await asyncio.gather(
-                *[client.websocket.close() for client in self.clients.values()],
-                return_exceptions=True
-            )
+            websockets_to_reap = [client.websocket for client in self.clients.values()]
+            for websocket in websockets_to_reap:
+                websocket.transport.abort()
+            if wait_for_clients:
+                await asyncio.wait(
+                    [asyncio.create_task(websocket.wait_closed()) for websocket in websockets_to_reap],
+                    timeout=2.0
+                )
         
         # Stop the server
         if self.server:
@@ -248,13 +441,12 @@ class WebSocketServer:
         self.clients[client_id] = client
         logger.info(f"Client {client_id} connected")
         
+        # One long-lived sender per client instead of a task per message
+        relay_task = asyncio.create_task(self._client_relay(client))
+        
         try:
             # Send welcome message
-            welcome_message = WebSocketMessage(
-                type="welcome",
-                data={"client_id": client_id}
-            )
-            await websocket.send(welcome_message.to_json())
+            await websocket.send(encode_welcome(client_id))
             
             # Handle incoming messages
             async for message in websocket:
@@ -274,103 +466,136 @@ class WebSocketServer:
             logger.error(f"Error handling client {client_id}: {e}")
         finally:
             # Clean up client
+            relay_task.cancel()
+            for job_id in client.subscribed_jobs:
+                self._remove_job_subscriber(job_id, client_id)
+            self.metrics_subscribers.discard(client_id)
             if client_id in self.clients:
                 del self.clients[client_id]
     
     async def handle_message(self, client: ClientSubscription, message: str):
         """Handle incoming message from client"""
         try:
-            data = json.loads(message)
-            message_type = data.get("type")
-            payload = data.get("data", {})
-            
-            if message_type == "subscribe_job":
-                job_id = payload.get("job_id")
-                if job_id is not None:
-                    client.subscribed_jobs.add(job_id)
-                    
-                    # Send current job status if available
-                    job_status = self.progress_tracker.get_job_status(job_id)
-                    if job_status:
-                        status_message = WebSocketMessage(
-                            type="job_status",
-                            data=job_status
-                        )
-                        await client.websocket.send(status_message.to_json())
-            
-            elif message_type == "unsubscribe_job":
-                job_id = payload.get("job_id")
-                if job_id is not None:
-                    client.subscribed_jobs.discard(job_id)
-            
-            elif message_type == "subscribe_metrics":
-                client.subscribed_metrics = True
-            
-            elif message_type == "unsubscribe_metrics":
-                client.subscribed_metrics = False
-            
-            elif message_type == "ping":
-                client.last_ping = time.time()
-                pong_message = WebSocketMessage(
-                    type="pong",
-                    data={}
-                )
-                await client.websocket.send(pong_message.to_json())
-            
-            else:
-                logger.warning(f"Unknown message type: {message_type}")
-        
+            data = json_loads(message)
         except json.JSONDecodeError:
             logger.error(f"Invalid JSON message from client {client.client_id}")
-        except Exception as e:
-            logger.error(f"Error processing message: {e}")
-    
-    async def broadcast_to_job_subscribers(self, job_id: int, message: WebSocketMessage):
-        """Broadcast message to clients subscribed to a specific job"""
-        if not self.clients:
             return
         
-        subscribers = [
-            client for client in self.clients.values()
-            if job_id in client.subscribed_jobs
-        ]
-        
-        if subscribers:
-            await asyncio.gather(
-                *[self._send_safe(client.websocket, message) for client in subscribers],
-                return_exceptions=True
-            )
+        message_type = data.get("type")
+        handler = self._handlers.get(message_type)
+        if handler:
+            await handler(client, data.get("data", {}))
+        else:
+            logger.warning(f"Unknown message type: {message_type}")
     
-    async def broadcast_to_metrics_subscribers(self, message: WebSocketMessage):
-        """Broadcast message to clients subscribed to metrics"""
-        if not self.clients:
-            return
-        
-        subscribers = [
-            client for client in self.clients.values()
-            if client.subscribed_metrics
-        ]
-        
-        if subscribers:
-            await asyncio.gather(
-                *[self._send_safe(client.websocket, message) for client in subscribers],
-                return_exceptions=True
-            )
+    async def _on_subscribe_job(self, client: ClientSubscription, payload: Dict):
+        """Subscribe a client to a job and send its current status"""
+        job_id = payload.get("job_id")
+        if job_id is not None:
+            client.subscribed_jobs.add(job_id)
+            self.job_subscribers[job_id].add(client.client_id)
+            
+            # Send current job status if available (encoded straight from the live job state)
+            job_status = self.progress_tracker.job_progress.get(job_id)
+            if job_status:
+                status_message = WebSocketMessage(
+                    type="job_status",
+                    data=job_status
+                )
+                await client.websocket.send(status_message.to_json())
     
-    async def broadcast_to_all(self, message: WebSocketMessage):
-        """Broadcast message to all connected clients"""
-        if not self.clients:
-            return
-        
-        await asyncio.gather(
-            *[self._send_safe(client.websocket, message) for client in self.clients.values()],
-            return_exceptions=True
+    async def _on_unsubscribe_job(self, client: ClientSubscription, payload: Dict):
+        """Unsubscribe a client from a job"""
+        job_id = payload.get("job_id")
+        if job_id is not None:
+            client.subscribed_jobs.discard(job_id)
+            self._remove_job_subscriber(job_id, client.client_id)
+    
+    async def _on_subscribe_metrics(self, client: ClientSubscription, payload: Dict):
+        """Subscribe a client to system metrics"""
+        client.subscribed_metrics = True
+        self.metrics_subscribers.add(client.client_id)
+        
+        # Wake the metrics loop if it is idle
+        if self._metrics_subscribed:
+            self._metrics_subscribed.set()
+    
+    async def _on_unsubscribe_metrics(self, client: ClientSubscription, payload: Dict):
+        """Unsubscribe a client from system metrics"""
+        client.subscribed_metrics = False
+        self.metrics_subscribers.discard(client.client_id)
+    
+    async def _on_ping(self, client: ClientSubscription, payload: Dict):
+        """Answer an application-level ping"""
+        client.last_ping = time.time()
+        await client.websocket.send(PONG_PAYLOAD)
+    
+    def _remove_job_subscriber(self, job_id: int, client_id: str):
+        """Remove a client from a job's subscriber index"""
+        subscribers = self.job_subscribers.get(job_id)
+        if subscribers is not None:
+            subscribers.discard(client_id)
+            if not subscribers:
+                del self.job_subscribers[job_id]
+    
+    def has_subscribers(self, job_id: int) -> bool:
+        """Check whether any client is subscribed to a job"""
+        return bool(self.job_subscribers.get(job_id))
+    
+    def broadcast_to_job_subscribers(self, job_id: int, payload: str):
+        """Broadcast a serialized message to clients subscribed to a specific job"""
+        self._fan_out(
+            (self.clients[client_id] for client_id in self.job_subscribers.get(job_id, ())),
+            payload
         )
     
-    async def _send_safe(self, websocket: WebSocketServerProtocol, message: WebSocketMessage):
-        """Safely send message to websocket"""
+    def broadcast_to_metrics_subscribers(self, payload: str):
+        """Broadcast a serialized message to clients subscribed to metrics"""
+        self._fan_out((self.clients[client_id] for client_id in self.metrics_subscribers), payload)
+    
+    def broadcast_to_all(self, payload: str):
+        """Broadcast a serialized message to all connected clients"""
+        self._fan_out(self.clients.values(), payload)
+    
+    def _fan_out(self, clients: Iterable[ClientSubscription], payload: str):
+        """Write a payload to idle clients directly and queue it for backlogged ones"""
+        direct = []
+        for client in clients:
+            # An empty queue means nothing is waiting ahead of this payload, so
+            # writing straight to the transport keeps messages in order
+            transport = client.websocket.transport
+            if (client.out_queue.empty() and transport is not None
+                    and transport.get_write_buffer_size() < WRITE_BUFFER_HIGH_WATER):
+                direct.append(client.websocket)
+            else:
+                self._enqueue(client, payload)
+        
+        if direct:
+            # Encodes the frame once and writes those same bytes to every transport,
+            # synchronously and without a task per client
+            websockets.broadcast(direct, payload)
+    
+    def _enqueue(self, client: ClientSubscription, payload: str):
+        """Queue a payload for a client, dropping it if the client can't keep up"""
+        try:
+            # Queues hold references to the one shared payload string, never copies
+            client.out_queue.put_nowait(payload)
+        except asyncio.QueueFull:
+            logger.warning(f"Send queue full for client {client.client_id}, dropping message")
+    
+    async def _client_relay(self, client: ClientSubscription):
+        """Send queued payloads to a client in order"""
+        try:
+            while True:
+                payload = await client.out_queue.get()
+                await self._send_safe(client.websocket, payload)
+        except asyncio.CancelledError:
+            pass
+    
+    async def _send_safe(self, websocket: WebSocketServerProtocol, payload: str):
+        """Safely send a serialized message to websocket"""
         try:
-            await websocket.send(message.to_json())
+            await websocket.send(payload)
         except websockets.exceptions.ConnectionClosed:
             pass  # Client disconnected
         except Exception as e:
@@ -378,20 +603,24 @@ class WebSocketServer:
     
     async def broadcast_metrics_loop(self):
         """Periodically broadcast system metrics"""
+        self._metrics_subscribed = asyncio.Event()
+        
         try:
             from .gpu_manager import gpu_manager
             
             while self.is_running:
                 try:
+                    # Sleep without polling the GPU manager while nobody is subscribed
+                    if not self.metrics_subscribers:
+                        self._metrics_subscribed.clear()
+                        await self._metrics_subscribed.wait()
+                        continue
+                    
                     # Get system status
                     status = gpu_manager.get_system_status()
                     
-                    # Broadcast to metrics subscribers
-                    message = WebSocketMessage(
-                        type="system_metrics",
-                        data=status
-                    )
-                    await self.broadcast_to_metrics_subscribers(message)
+                    # Broadcast one shared payload to metrics subscribers
+                    self.broadcast_to_metrics_subscribers(encode_system_metrics(status))
                     
                     await asyncio.sleep(2.0)  # Broadcast every 2 seconds
                     
@@ -433,9 +662,14 @@ async def stop_websocket_server():
 
 
 def run_websocket_server():
-    """Run WebSocket server in a separate thread"""
+    """Run WebSocket server in a separate thread
+    
+    All clients share this single event loop. Broadcasts are encoded once and written
+    synchronously to each subscriber (see WebSocketServer._fan_out), which keeps
+    fan-out cheap for the number of dashboard clients this server handles.
+    """
     def server_thread():
-        loop = asyncio.new_event_loop()
+        loop = uvloop.new_event_loop() if UVLOOP_AVAILABLE else asyncio.new_event_loop()
         asyncio.set_event_loop(loop)
         
         try:
@@ -500,7 +734,7 @@ if __name__ == "__main__":
         except KeyboardInterrupt:
             pass
         finally:
-            await websocket_server.stop_server()
+            await websocket_server.stop_server(wait_for_clients=False)
     
     def signal_handler(sig, frame):
         print("\nStopping WebSocket server...")
@@ -511,6 +745,9 @@ if __name__ == "__main__":
     print("Starting WebSocket server test...")
     print("Connect to ws://localhost:8001 to test")
     
+    if UVLOOP_AVAILABLE:
+        uvloop.install()
+    
     try:
         asyncio.run(test_server())
     except KeyboardInterrupt:
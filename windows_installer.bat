@@ -101,17 +101,23 @@ python -m pip install --upgrade pip --quiet
 echo [安装] PyTorch GPU版本 ^(RTX 3060 Ti优化^)...
 python -m pip install torch torchvision torchaudio --index-url https://download.pytorch.org/whl/cu121 --quiet
 
+echo [安装] GPU监控库...
+python -m pip install nvidia-ml-py3 --quiet
+
 echo [安装] 音频处理库...
 python -m pip install librosa soundfile --quiet
 
 echo [安装] OpenAI Whisper...
 python -m pip install openai-whisper --quiet
 
+echo [安装] Faster-Whisper ^(CTranslate2加速^)...
+python -m pip install faster-whisper --quiet
+
 echo [安装] 中文处理库...
 python -m pip install jieba pypinyin zhconv --quiet
 
 echo [安装] 网络服务库...
-python -m pip install fastapi uvicorn python-multipart --quiet
+python -m pip install fastapi uvicorn python-multipart streaming-form-data orjson --quiet
 
 echo [安装] 视频处理库...
 python -m pip install opencv-python ffmpeg-python --quiet
@@ -4,31 +4,86 @@ Windows RTX 3060 Ti 中文电视剧转录系统
 一键启动完整解决方案
 """
 
+import io
 import os
 import sys
 import json
 import time
+import gzip
+import queue
+import atexit
 import logging
+import itertools
 import threading
 import webbrowser
+import multiprocessing
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+from collections import OrderedDict
+from dataclasses import dataclass, replace, is_dataclass
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from pathlib import Path
-from http.server import HTTPServer, SimpleHTTPRequestHandler
-from urllib.parse import parse_qs, urlparse
-import cgi
+from http.server import ThreadingHTTPServer, SimpleHTTPRequestHandler
+from urllib.parse import parse_qs, urlparse, quote
 import tempfile
+import shutil
 import subprocess
 
-# 配置日志
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler('transcriber.log', encoding='utf-8'),
+# 配置日志: 日志调用只入队，由后台线程写文件 (10MB轮转) 和控制台
+_LOG_QUEUE = queue.Queue(-1)
+_LOG_HANDLERS = ()
+
+def _setup_logging():
+    """根日志器只挂QueueHandler，文件和控制台输出由QueueListener线程完成"""
+    global _LOG_HANDLERS
+    
+    root = logging.getLogger()
+    root.setLevel(logging.INFO)
+    root.addHandler(QueueHandler(_LOG_QUEUE))
+    
+    # 子进程不打开日志文件，其日志由_init_model_server转发给主进程
+    if multiprocessing.current_process().name != 'MainProcess':
+        return
+    
+    formatter = logging.Formatter('%(asctime)s - %(levelname)s - %(message)s')
+    _LOG_HANDLERS = (
+        RotatingFileHandler('transcriber.log', maxBytes=10 << 20, backupCount=3, encoding='utf-8'),
         logging.StreamHandler()
-    ]
-)
+    )
+    for handler in _LOG_HANDLERS:
+        handler.setFormatter(formatter)
+    
+    listener = QueueListener(_LOG_QUEUE, *_LOG_HANDLERS)
+    listener.start()
+    atexit.register(listener.stop)
+
+_setup_logging()
 logger = logging.getLogger(__name__)
 
+# 流式multipart解析 (边接收边写盘)
+try:
+    from streaming_form_data import StreamingFormDataParser
+    from streaming_form_data.targets import FileTarget
+    STREAMING_FORM_DATA_AVAILABLE = True
+except ImportError:
+    STREAMING_FORM_DATA_AVAILABLE = False
+    logger.warning("streaming-form-data未安装，无法接收上传文件，请运行: pip install streaming-form-data")
+
+# JSON响应编码 (优先orjson)
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+def _json_default(obj):
+    """标准库json的兜底编码: 数据类按字段输出 (orjson原生支持)"""
+    if is_dataclass(obj):
+        return vars(obj)
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+# 上传时每次从socket读取的字节数
+UPLOAD_CHUNK_SIZE = 1 << 20
+
 # 检查依赖
 def check_dependencies():
     """检查系统依赖"""
@@ -53,66 +108,247 @@ def check_dependencies():
     except ImportError:
         logger.warning("PyTorch未安装，请运行: pip install torch torchvision torchaudio --index-url https://download.pytorch.org/whl/cu121")
     
-    # 检查Whisper
+    # 检查Whisper (优先faster-whisper)
     try:
-        import whisper
+        import faster_whisper
         deps['whisper'] = True
     except ImportError:
-        logger.warning("Whisper未安装，请运行: pip install openai-whisper")
+        try:
+            import whisper
+            deps['whisper'] = True
+            logger.warning("建议安装faster-whisper以获得更快速度: pip install faster-whisper")
+        except ImportError:
+            logger.warning("Whisper未安装，请运行: pip install faster-whisper")
     
     # 检查FFmpeg
-    try:
-        result = subprocess.run(['ffmpeg', '-version'], capture_output=True, text=True)
-        deps['ffmpeg'] = result.returncode == 0
-    except:
+    deps['ffmpeg'] = shutil.which('ffmpeg') is not None
+    if not deps['ffmpeg']:
         logger.warning("FFmpeg未安装，请从 https://ffmpeg.org 下载")
     
-    # 检查NVIDIA
-    try:
-        result = subprocess.run(['nvidia-smi'], capture_output=True, text=True)
-        deps['nvidia'] = 'RTX 3060' in result.stdout or 'GeForce' in result.stdout
-    except:
+    # 检查NVIDIA (优先NVML，无需启动nvidia-smi进程，也不在主进程初始化CUDA)
+    gpu_name = ""
+    handle = _get_nvml_handle()
+    if handle is not None:
+        import pynvml
+        gpu_name = pynvml.nvmlDeviceGetName(handle)
+        if isinstance(gpu_name, bytes):
+            gpu_name = gpu_name.decode('utf-8', errors='replace')
+    elif deps['torch']:
+        import torch
+        gpu_name = torch.cuda.get_device_name(0)
+    
+    deps['nvidia'] = 'RTX 3060' in gpu_name or 'GeForce' in gpu_name
+    if not deps['nvidia']:
         logger.warning("NVIDIA GPU未检测到")
     
     return deps
 
+_NVML_HANDLE = None
+_NVML_INITIALIZED = False
+_NVML_LOCK = threading.Lock()
+
+def _get_nvml_handle():
+    """获取GPU 0的NVML句柄 (只初始化一次)"""
+    global _NVML_HANDLE, _NVML_INITIALIZED
+    if _NVML_INITIALIZED:
+        return _NVML_HANDLE
+    
+    # 并发的首次请求等待初始化完成，而不是读到尚未设置的句柄
+    with _NVML_LOCK:
+        if not _NVML_INITIALIZED:
+            try:
+                import pynvml
+                pynvml.nvmlInit()
+                _NVML_HANDLE = pynvml.nvmlDeviceGetHandleByIndex(0)
+            except Exception:
+                _NVML_HANDLE = None
+            _NVML_INITIALIZED = True
+    return _NVML_HANDLE
+
+def get_gpu_memory():
+    """通过NVML读取实时显存占用 (MB)，不可用时返回None"""
+    handle = _get_nvml_handle()
+    if handle is None:
+        return None
+    
+    try:
+        import pynvml
+        info = pynvml.nvmlDeviceGetMemoryInfo(handle)
+        return {"used": info.used >> 20, "total": info.total >> 20}
+    except Exception:
+        return None
+
+# 启动时在main()中检查一次依赖，/api/status直接读取缓存结果
+_DEPS = None
+
+# 音频解码
+def _ffmpeg_pcm_command(file_path, output, sample_rate=16000):
+    """FFmpeg命令: 只解码音轨，输出16位单声道PCM"""
+    # -vn跳过视频流，不解码画面，因此也不需要硬件解码器
+    return [
+        'ffmpeg', '-nostdin', '-y',
+        '-i', file_path,
+        '-vn',
+        '-ac', '1',
+        '-ar', str(sample_rate),
+        '-f', 's16le',
+        output
+    ]
+
+def extract_audio(file_path, sample_rate=16000):
+    """用FFmpeg把音轨解码为float32 PCM数组"""
+    import numpy as np
+    
+    result = subprocess.run(_ffmpeg_pcm_command(file_path, 'pipe:1', sample_rate), check=True, capture_output=True)
+    return np.frombuffer(result.stdout, np.int16).astype(np.float32) / 32768.0
+
+def extract_audio_to_file(file_path, pcm_path, sample_rate=16000):
+    """用FFmpeg把音轨解码为16位PCM文件"""
+    subprocess.run(_ffmpeg_pcm_command(file_path, pcm_path, sample_rate), check=True, capture_output=True)
+
+# 模型选择
+DEFAULT_MODEL = "distil-large-v3"
+
+# 各模型在int8_float16下的大致显存占用 (MB)，供前端在显存不足前提示
+MODEL_VRAM_MB = {
+    "tiny": 400,
+    "base": 500,
+    "small": 900,
+    "medium": 1700,
+    "large-v3": 3000,
+    "distil-large-v3": 1500
+}
+
+def resolve_model_name(language="zh"):
+    """读取WHISPER_MODEL，蒸馏模型偏重英语，中文内容改用large-v3"""
+    name = os.environ.get("WHISPER_MODEL", DEFAULT_MODEL)
+    if name.startswith("distil-") and language == "zh":
+        return "large-v3"
+    return name
+
 # 转录引擎
 class SimpleTranscriber:
+    # VAD切分后每次送入编码器的语音片段数 (每段不超过30秒)
+    BATCH_SIZE = 8
+    VAD_PARAMETERS = {"min_silence_duration_ms": 500}
+    
     def __init__(self):
         self.model = None
+        self.batched_model = None
         self.device = "cpu"
+        self.backend = None
+        self.model_name = resolve_model_name()
         self.load_model()
     
     def load_model(self):
         """加载模型"""
         try:
             import torch
-            import whisper
             
             if torch.cuda.is_available():
                 self.device = "cuda"
                 logger.info(f"使用GPU: {torch.cuda.get_device_name(0)}")
+                
+                # Ampere张量核心: 剩余的FP32矩阵乘法走TF32
+                torch.backends.cuda.matmul.allow_tf32 = True
+                torch.backends.cudnn.allow_tf32 = True
+                torch.set_float32_matmul_precision("high")
             else:
                 logger.info("使用CPU模式")
             
+            # 优先使用faster-whisper (CTranslate2): GPU默认int8_float16, CPU默认int8
+            try:
+                from faster_whisper import WhisperModel
+                
+                default_compute_type = "int8_float16" if self.device == "cuda" else "int8"
+                compute_type = os.environ.get("WHISPER_COMPUTE_TYPE", default_compute_type)
+                self.model = WhisperModel(self.model_name, device=self.device, compute_type=compute_type, num_workers=1)
+                self.backend = "faster-whisper"
+                
+                # 批量推理管线: Silero VAD去除静音并切成≤30秒片段，多个片段一次编码
+                try:
+                    from faster_whisper import BatchedInferencePipeline
+                    self.batched_model = BatchedInferencePipeline(model=self.model)
+                except ImportError:
+                    logger.warning("当前faster-whisper版本不支持批量推理，将逐段解码")
+                logger.info(f"Whisper模型加载成功 ({self.model_name}, faster-whisper, {compute_type})")
+                return
+            except ImportError:
+                logger.warning("faster-whisper未安装，回退到openai-whisper")
+            
             # 加载Whisper模型
-            self.model = whisper.load_model("base", device=self.device)
-            logger.info("Whisper模型加载成功")
+            import whisper
+            self.model = whisper.load_model(self.model_name, device=self.device)
+            self.backend = "openai-whisper"
+            
+            if self.device == "cuda":
+                self._half_weights()
+                if os.environ.get("WHISPER_TORCH_COMPILE", "1") != "0":
+                    self._compile_encoder()
+            logger.info(f"Whisper模型加载成功 ({self.model_name})")
             
         except Exception as e:
             logger.error(f"模型加载失败: {e}")
             self.model = None
     
+    def _half_weights(self):
+        """把线性层、卷积层和词嵌入权重转为FP16，减半显存读写量"""
+        import torch.nn as nn
+        
+        # LayerNorm在whisper中以FP32计算，其权重保持FP32
+        for module in self.model.modules():
+            if isinstance(module, (nn.Linear, nn.Conv1d, nn.Embedding)):
+                module.half()
+    
+    def _compile_encoder(self):
+        """编译编码器 (固定30秒mel输入)，用CUDA Graph重放每个窗口"""
+        import torch
+        
+        version = tuple(int(part) for part in torch.__version__.split('+')[0].split('.')[:2])
+        if version < (2, 1):
+            return
+        
+        try:
+            encoder = torch.compile(self.model.encoder, mode="reduce-overhead", fullgraph=True)
+            
+            # 启动时用空白mel预热，首个上传请求不再承担编译和图捕获的开销
+            dims = self.model.dims
+            dummy_mel = torch.zeros(1, dims.n_mels, dims.n_audio_ctx * 2, dtype=torch.float16, device=self.device)
+            with torch.no_grad():
+                encoder(dummy_mel)
+            
+            self.model.encoder = encoder
+            logger.info("编码器编译完成")
+        except Exception as e:
+            logger.warning(f"编码器编译失败，使用普通模式: {e}")
+    
     def transcribe_file(self, file_path, progress_callback=None):
         """转录文件"""
         if self.model is None:
             return {"error": "模型未加载"}
         
+        try:
+            # 只解码音轨，直接得到16kHz单声道PCM，模型不再自行调用ffmpeg
+            audio = extract_audio(file_path)
+        except Exception as e:
+            logger.error(f"音频解码失败: {e}")
+            return {"error": str(e)}
+        
+        return self.transcribe_audio(audio, progress_callback)
+    
+    def transcribe_audio(self, audio, progress_callback=None):
+        """转录16kHz单声道float32 PCM数组"""
+        if self.model is None:
+            return {"error": "模型未加载"}
+        
         try:
             if progress_callback:
                 progress_callback(10, "开始转录...")
             
-            result = self.model.transcribe(file_path, language="zh")
+            if self.backend == "faster-whisper":
+                return self._transcribe_faster_whisper(audio, progress_callback)
+            
+            result = self.model.transcribe(audio, language="zh", fp16=self.device == "cuda")
             
             if progress_callback:
                 progress_callback(90, "处理结果...")
@@ -139,35 +375,322 @@ class SimpleTranscriber:
         except Exception as e:
             logger.error(f"转录失败: {e}")
             return {"error": str(e)}
+    
+    def _transcribe_faster_whisper(self, audio, progress_callback=None):
+        """使用faster-whisper转录，边解码边汇报进度"""
+        if self.batched_model is not None:
+            # 片段时间戳已按VAD窗口起点还原为绝对时间
+            segments_iter, info = self.batched_model.transcribe(
+                audio, language="zh", beam_size=1, batch_size=self.BATCH_SIZE,
+                vad_filter=True, vad_parameters=self.VAD_PARAMETERS
+            )
+        else:
+            segments_iter, info = self.model.transcribe(
+                audio, language="zh", beam_size=1,
+                vad_filter=True, vad_parameters=self.VAD_PARAMETERS
+            )
+        
+        # segments是生成器，逐段解码
+        segments = []
+        for segment in segments_iter:
+            segments.append({
+                "start": segment.start,
+                "end": segment.end,
+                "text": segment.text.strip()
+            })
+            
+            if progress_callback and info.duration:
+                progress = 10 + int(80 * min(segment.end / info.duration, 1.0))
+                progress_callback(progress, "转录中...")
+        
+        if progress_callback:
+            progress_callback(100, "完成")
+        
+        return {
+            "success": True,
+            "text": "".join(segment["text"] for segment in segments),
+            "segments": segments,
+            "language": info.language or "zh"
+        }
 
-# 全局转录器实例
-transcriber = SimpleTranscriber()
-active_jobs = {}
+# 模型服务进程内的转录器实例，由_init_model_server创建
+transcriber = None
 
-# HTTP请求处理器
-class TranscriberHandler(SimpleHTTPRequestHandler):
-    def do_GET(self):
-        """处理GET请求"""
-        if self.path == '/' or self.path == '/index.html':
-            self.send_html_page()
-        elif self.path.startswith('/api/status'):
-            self.send_status()
-        elif self.path.startswith('/api/job/'):
-            job_id = self.path.split('/')[-1]
-            self.send_job_status(job_id)
-        else:
-            super().do_GET()
+@dataclass(frozen=True)
+class JobState:
+    """任务状态快照: 每次更新整体替换，读取方总能看到一致的状态"""
+    id: str
+    filename: str
+    progress: int = 0
+    status: str = "准备中"
+    finished: bool = False
+    success: bool = False
+    result: dict = None
+    error: str = None
+
+# 任务表按最近访问排序，超过上限时淘汰最久未访问的任务
+MAX_TRACKED_JOBS = 1024
+active_jobs = OrderedDict()
+_JOBS_LOCK = threading.Lock()
+_JOB_COUNTER = itertools.count(1)
+
+def _new_job_id():
+    """生成不会冲突的任务ID (时间戳 + 自增序号)"""
+    with _JOBS_LOCK:
+        return f"{int(time.time()):x}-{next(_JOB_COUNTER):x}"
+
+# 本进程私有的字幕文件目录，首次使用时创建，退出时删除；任务被淘汰时删除其字幕
+_RESULT_DIR = None
+_RESULT_DIR_LOCK = threading.Lock()
+
+def _result_dir():
+    """返回字幕目录，首次调用时创建"""
+    global _RESULT_DIR
+    with _RESULT_DIR_LOCK:
+        if _RESULT_DIR is None:
+            _RESULT_DIR = tempfile.mkdtemp(prefix='transcriber_results_')
+            atexit.register(shutil.rmtree, _RESULT_DIR, ignore_errors=True)
+        return _RESULT_DIR
+
+def _format_srt_time(seconds):
+    """秒数转为SRT时间格式 00:00:00,000"""
+    millis = int(round(seconds * 1000))
+    hours, millis = divmod(millis, 3600000)
+    minutes, millis = divmod(millis, 60000)
+    secs, millis = divmod(millis, 1000)
+    return f"{hours:02d}:{minutes:02d}:{secs:02d},{millis:03d}"
+
+def _result_file(job):
+    """返回任务的SRT文件路径，首次请求时生成"""
+    path = os.path.join(_result_dir(), f"{job.id}.srt")
+    if not os.path.exists(path):
+        lines = []
+        for index, segment in enumerate(job.result["segments"], 1):
+            lines.append(str(index))
+            lines.append(f"{_format_srt_time(segment['start'])} --> {_format_srt_time(segment['end'])}")
+            lines.append(segment["text"])
+            lines.append("")
+        
+        # 先写临时文件再改名，并发请求不会读到写了一半的文件
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write("\n".join(lines))
+        os.replace(tmp_path, path)
+    return path
+
+def _update_job(job_id, **changes):
+    """在锁内用新快照替换任务状态，已结束的任务不再更新"""
+    with _JOBS_LOCK:
+        job = active_jobs.get(job_id)
+        if job is None or job.finished:
+            return
+        active_jobs[job_id] = replace(job, **changes)
+
+def _register_job(job_id, job):
+    """登记新任务，必要时淘汰最久未访问的已结束任务"""
+    with _JOBS_LOCK:
+        active_jobs[job_id] = job
+        
+        # 只淘汰已结束的任务；已结束的不够时允许暂时超出上限，不丢弃排队或进行中的任务
+        excess = len(active_jobs) - MAX_TRACKED_JOBS
+        if excess <= 0:
+            return
+        evicted_ids = [
+            tracked_id for tracked_id, tracked in active_jobs.items() if tracked.finished
+        ][:excess]
+        for evicted_id in evicted_ids:
+            del active_jobs[evicted_id]
+            if _RESULT_DIR is None:
+                continue
+            try:
+                os.unlink(os.path.join(_RESULT_DIR, f"{evicted_id}.srt"))
+            except FileNotFoundError:
+                pass
+
+def _lookup_job(job_id):
+    """查询任务并标记为最近访问"""
+    with _JOBS_LOCK:
+        job = active_jobs.get(job_id)
+        if job is not None:
+            active_jobs.move_to_end(job_id)
+        return job
+
+_MODEL_SERVER = None
+_PROGRESS_QUEUE = None
+_MODEL_READY = None
+
+# 解码后的PCM通过文件交给模型服务进程，避免pickle大数组
+# 默认放在Linux内存文件系统，可用TRANSCRIBER_PCM_DIR指定目录
+_PCM_DIR = os.environ.get("TRANSCRIBER_PCM_DIR") or ('/dev/shm' if os.path.isdir('/dev/shm') else tempfile.gettempdir())
+
+def _init_model_server(progress_queue, log_queue):
+    """模型服务进程初始化: 全局只加载这一份模型"""
+    global transcriber, _PROGRESS_QUEUE
     
-    def do_POST(self):
-        """处理POST请求"""
-        if self.path == '/api/upload':
-            self.handle_upload()
+    # 日志交给主进程统一写入
+    logging.getLogger().handlers = [QueueHandler(log_queue)]
+    
+    _PROGRESS_QUEUE = progress_queue
+    transcriber = SimpleTranscriber()
+
+def _model_server_loaded():
+    """模型服务进程中模型是否加载成功"""
+    return transcriber is not None and transcriber.model is not None
+
+def _transcribe_pcm(job_id, pcm_path):
+    """在模型服务进程中转录PCM文件，进度通过队列回传主进程"""
+    import numpy as np
+    
+    try:
+        audio = np.fromfile(pcm_path, np.int16).astype(np.float32) / 32768.0
+    finally:
+        os.unlink(pcm_path)
+    
+    def progress_callback(progress, status):
+        _PROGRESS_QUEUE.put((job_id, progress, status))
+    
+    return transcriber.transcribe_audio(audio, progress_callback=progress_callback)
+
+def _drain_progress(progress_queue):
+    """主进程线程: 把模型服务进程回传的进度写入active_jobs"""
+    while True:
+        job_id, progress, status = progress_queue.get()
+        _update_job(job_id, progress=progress, status=status)
+
+def _finish_job(job_id, future):
+    """转录完成回调: 记录结果或错误"""
+    try:
+        result = future.result()
+    except Exception as e:
+        result = {"error": str(e)}
+    
+    if "error" in result:
+        logger.error(f"转录失败: {result['error']}")
+        _update_job(job_id, finished=True, success=False, error=result["error"])
+    else:
+        _update_job(job_id, progress=100, status="完成", finished=True, success=True, result=result)
+
+# 已解码、等待模型服务进程处理的PCM数量上限，解码领先GPU过多时阻塞解码线程
+MAX_PENDING_AUDIO = 4
+_PENDING_AUDIO = threading.Semaphore(MAX_PENDING_AUDIO)
+
+# 16kHz 16位单声道约115MB/小时；可用空间不足以容纳一批待处理音频时改用临时目录
+# (容器中/dev/shm常只有64MB)
+PCM_DIR_MIN_FREE = MAX_PENDING_AUDIO * (256 << 20)
+
+def _pcm_dir():
+    """选择存放PCM的目录，空间不足时退回系统临时目录"""
+    try:
+        if shutil.disk_usage(_PCM_DIR).free >= PCM_DIR_MIN_FREE:
+            return _PCM_DIR
+    except OSError:
+        pass
+    return tempfile.gettempdir()
+
+def submit_transcription(job_id, file_path):
+    """在当前线程解码音频，再把PCM文件提交给模型服务进程"""
+    _PENDING_AUDIO.acquire()
+    
+    pcm_path = None
+    try:
+        fd, pcm_path = tempfile.mkstemp(suffix='.pcm', dir=_pcm_dir())
+        os.close(fd)
+        extract_audio_to_file(file_path, pcm_path)
+        future = _MODEL_SERVER.submit(_transcribe_pcm, job_id, pcm_path)
+    except Exception:
+        if pcm_path is not None:
+            os.unlink(pcm_path)
+        _PENDING_AUDIO.release()
+        raise
+    
+    future.add_done_callback(lambda f: _PENDING_AUDIO.release())
+    future.add_done_callback(lambda f: _finish_job(job_id, f))
+    return future
+
+def run_job(job_id, file_path):
+    """解码文件并提交转录，失败时记录到任务状态"""
+    try:
+        _update_job(job_id, progress=5, status="解码音频...")
+        
+        # 转录在模型服务进程中继续，结果由完成回调写入
+        submit_transcription(job_id, file_path)
+        
+    except Exception as e:
+        logger.error(f"转录失败: {e}")
+        _update_job(job_id, finished=True, success=False, error=str(e))
+
+# 批量转录: 多个解码线程 (生产者) 为单个模型服务进程 (消费者) 供料
+BATCH_DECODE_WORKERS = 4
+MEDIA_EXTENSIONS = {'.mp4', '.mkv', '.avi', '.mov', '.flv', '.ts', '.wmv', '.mp3', '.wav', '.m4a', '.aac', '.flac'}
+_DECODE_POOL = ThreadPoolExecutor(max_workers=BATCH_DECODE_WORKERS, thread_name_prefix="decode")
+
+# /api/batch请求体上限 (只含路径列表)
+MAX_BATCH_REQUEST_SIZE = 1 << 20
+
+# 批量转录只允许读取此目录下的文件，未配置时/api/batch不可用
+MEDIA_ROOT = os.environ.get("TRANSCRIBER_MEDIA_ROOT")
+
+def resolve_media_path(path):
+    """把请求中的路径解析为MEDIA_ROOT内的真实路径，越界时返回None"""
+    if not MEDIA_ROOT:
+        return None
+    
+    root = os.path.realpath(MEDIA_ROOT)
+    real_path = os.path.realpath(os.path.join(root, path))
+    try:
+        # 不同盘符时commonpath抛出ValueError，同样视为越界
+        if os.path.commonpath([root, real_path]) != root:
+            return None
+    except ValueError:
+        return None
+    return real_path
+
+def submit_batch(file_paths):
+    """为每个文件创建任务并交给解码线程池，按顺序返回任务ID"""
+    job_ids = []
+    for file_path in file_paths:
+        job_id = _new_job_id()
+        _register_job(job_id, JobState(id=job_id, filename=os.path.basename(file_path)))
+        
+        if os.path.isfile(file_path):
+            _DECODE_POOL.submit(run_job, job_id, file_path)
         else:
-            self.send_error(404)
+            _update_job(job_id, finished=True, success=False, error="文件不存在")
+        job_ids.append(job_id)
+    return job_ids
+
+def model_loaded():
+    """模型服务进程是否已成功加载模型 (不阻塞)"""
+    if _MODEL_READY is None or not _MODEL_READY.done():
+        return False
+    return _MODEL_READY.exception() is None and _MODEL_READY.result()
+
+def start_model_server():
+    """启动模型服务进程和进度转发线程"""
+    global _MODEL_SERVER, _MODEL_READY
     
-    def send_html_page(self):
-        """发送主页面"""
-        html = """
+    # 使用spawn: 主进程可能已初始化CUDA，fork出的子进程无法再使用
+    context = multiprocessing.get_context("spawn")
+    progress_queue = context.Queue()
+    log_queue = context.Queue()
+    
+    log_listener = QueueListener(log_queue, *_LOG_HANDLERS)
+    log_listener.start()
+    atexit.register(log_listener.stop)
+    
+    # 单进程持有唯一一份模型，任务按提交顺序在GPU上执行
+    _MODEL_SERVER = ProcessPoolExecutor(
+        max_workers=1,
+        mp_context=context,
+        initializer=_init_model_server,
+        initargs=(progress_queue, log_queue)
+    )
+    _MODEL_READY = _MODEL_SERVER.submit(_model_server_loaded)
+    
+    threading.Thread(target=_drain_progress, args=(progress_queue,), daemon=True).start()
+
+# 主页面 (启动时编码并gzip压缩一次)
+_HTML = """
 <!DOCTYPE html>
 <html lang="zh-CN">
 <head>
@@ -298,6 +821,7 @@ class TranscriberHandler(SimpleHTTPRequestHandler):
             <div class="result" id="resultContainer">
                 <h3>转录结果</h3>
                 <pre id="resultText"></pre>
+                <a class="btn" id="srtLink" download>📥 下载SRT字幕</a>
             </div>
         </div>
     </div>
@@ -400,6 +924,7 @@ class TranscriberHandler(SimpleHTTPRequestHandler):
         // 显示结果
         function showResult(result) {
             document.getElementById('resultText').textContent = result.text;
+            document.getElementById('srtLink').href = '/api/result/' + currentJobId + '.srt';
             document.getElementById('resultContainer').style.display = 'block';
         }
         
@@ -409,163 +934,316 @@ class TranscriberHandler(SimpleHTTPRequestHandler):
     </script>
 </body>
 </html>
-        """
+"""
+
+_HTML_BYTES = _HTML.encode('utf-8')
+_HTML_GZ = gzip.compress(_HTML_BYTES, compresslevel=9)
+
+# HTTP请求处理器
+class TranscriberHandler(SimpleHTTPRequestHandler):
+    # 所有响应都带Content-Length，浏览器轮询可复用同一连接
+    protocol_version = "HTTP/1.1"
+    
+    def do_GET(self):
+        """处理GET请求"""
+        if self.path == '/' or self.path == '/index.html':
+            self.send_html_page()
+        elif self.path.startswith('/api/status'):
+            self.send_status()
+        elif self.path.startswith('/api/job/'):
+            job_id = self.path.split('/')[-1]
+            self.send_job_status(job_id)
+        elif self.path.startswith('/api/result/') and self.path.endswith('.srt'):
+            job_id = self.path.split('/')[-1][:-len('.srt')]
+            self.send_srt(job_id)
+        else:
+            super().do_GET()
+    
+    def do_POST(self):
+        """处理POST请求"""
+        if self.path == '/api/upload':
+            self.handle_upload()
+        elif self.path == '/api/batch':
+            self.handle_batch()
+        else:
+            self.send_error(404)
+    
+    def send_html_page(self):
+        """发送主页面"""
+        if 'gzip' in self.headers.get('Accept-Encoding', ''):
+            body = _HTML_GZ
+        else:
+            body = _HTML_BYTES
         
         self.send_response(200)
         self.send_header('Content-type', 'text/html; charset=utf-8')
+        if body is _HTML_GZ:
+            self.send_header('Content-Encoding', 'gzip')
+        self.send_header('Vary', 'Accept-Encoding')
+        self.send_header('Content-Length', str(len(body)))
+        self.send_header('Cache-Control', 'public, max-age=3600')
         self.end_headers()
-        self.wfile.write(html.encode('utf-8'))
+        self.wfile.write(body)
     
     def send_status(self):
         """发送系统状态"""
-        deps = check_dependencies()
+        deps = _DEPS
         
         status = {
             "ready": deps['torch'] and deps['whisper'],
             "gpu": "RTX 3060 Ti" if deps['nvidia'] else "CPU",
-            "model": "Whisper Base" if transcriber.model else "未加载",
+            "model": f"Whisper {resolve_model_name()}" if model_loaded() else "未加载",
+            "model_vram_mb": MODEL_VRAM_MB,
             "message": "系统正常" if deps['torch'] and deps['whisper'] else "请安装依赖"
         }
         
+        gpu_memory = get_gpu_memory()
+        if gpu_memory:
+            status["gpu_memory"] = gpu_memory
+        
         self.send_json_response(status)
     
     def send_job_status(self, job_id):
         """发送任务状态"""
-        job = active_jobs.get(job_id, {"error": "任务不存在"})
-        self.send_json_response(job)
+        job = _lookup_job(job_id)
+        # 任务结果只供同源页面读取，不加跨域头
+        self.send_json_response(job if job is not None else {"error": "任务不存在"}, allow_cors=False)
+    
+    def send_srt(self, job_id):
+        """下载SRT字幕"""
+        job = _lookup_job(job_id)
+        if job is None or not job.success:
+            self.send_error(404, explain="结果不存在")
+            return
+        
+        filename = os.path.splitext(job.filename)[0] + '.srt'
+        self.send_file(_result_file(job), 'application/x-subrip; charset=utf-8', {
+            'Content-Disposition': f"attachment; filename*=UTF-8''{quote(filename)}"
+        })
+    
+    def send_file(self, path, content_type, headers=None):
+        """发送文件，支持时用sendfile由内核直接写入socket"""
+        with open(path, 'rb') as f:
+            size = os.fstat(f.fileno()).st_size
+            
+            self.send_response(200)
+            self.send_header('Content-type', content_type)
+            self.send_header('Content-Length', str(size))
+            for name, value in (headers or {}).items():
+                self.send_header(name, value)
+            self.end_headers()
+            
+            # Windows没有os.sendfile，退回用户态分块复制
+            if hasattr(os, 'sendfile'):
+                offset = 0
+                while offset < size:
+                    sent = os.sendfile(self.wfile.fileno(), f.fileno(), offset, size - offset)
+                    if sent == 0:
+                        break
+                    offset += sent
+            else:
+                shutil.copyfileobj(f, self.wfile, UPLOAD_CHUNK_SIZE)
     
     def handle_upload(self):
         """处理文件上传"""
         try:
             # 解析multipart数据
-            content_type = self.headers['content-type']
+            content_type = self.headers.get('Content-Type', '')
             if not content_type.startswith('multipart/form-data'):
-                self.send_error(400, "需要multipart/form-data")
+                self.send_error(400, explain="需要multipart/form-data")
+                return
+            
+            if not STREAMING_FORM_DATA_AVAILABLE:
+                self.send_error(500, explain="缺少streaming-form-data")
+                return
+            
+            file_path, filename = self.receive_upload()
+            if filename is None:
+                os.unlink(file_path)
+                self.send_error(400, explain="缺少上传文件")
                 return
             
             # 生成任务ID
-            job_id = str(int(time.time()))
+            job_id = _new_job_id()
             
             # 创建任务
-            job = {
-                "id": job_id,
-                "progress": 0,
-                "status": "准备中",
-                "finished": False,
-                "success": False,
-                "result": None,
-                "error": None
-            }
-            active_jobs[job_id] = job
+            _register_job(job_id, JobState(id=job_id, filename=filename))
             
             # 开始转录线程
-            thread = threading.Thread(target=self.process_upload, args=(job_id,))
+            thread = threading.Thread(target=self.process_upload, args=(job_id, file_path))
             thread.start()
             
             self.send_json_response({"success": True, "job_id": job_id})
             
         except Exception as e:
             logger.error(f"上传处理失败: {e}")
+            # 请求体可能未读完，不能复用连接
+            self.close_connection = True
             self.send_json_response({"success": False, "error": str(e)})
     
-    def process_upload(self, job_id):
-        """处理上传的文件"""
-        job = active_jobs[job_id]
+    def handle_batch(self):
+        """批量转录MEDIA_ROOT内的文件: {"files": [...]} 或 {"folder": "..."}"""
+        # 只接受application/json: 跨站页面无法不经预检就发出这种请求
+        content_type = self.headers.get('Content-Type', '')
+        if content_type.split(';')[0].strip().lower() != 'application/json':
+            self.send_error(415, explain="需要application/json")
+            return
+        
+        if not MEDIA_ROOT:
+            self.send_error(403, explain="未配置TRANSCRIBER_MEDIA_ROOT，批量转录不可用")
+            return
         
         try:
-            # 模拟文件保存和转录过程
-            job["progress"] = 20
-            job["status"] = "保存文件..."
-            time.sleep(1)
+            length = int(self.headers.get('Content-Length', 0))
+        except ValueError:
+            self.send_error(400, explain="Content-Length无效")
+            return
+        
+        if length < 0:
+            self.send_error(400, explain="Content-Length无效")
+            return
+        
+        if length > MAX_BATCH_REQUEST_SIZE:
+            self.send_error(413, explain="请求体过大")
+            return
+        
+        try:
+            request = json.loads(self.rfile.read(length) or b'{}')
             
-            job["progress"] = 50
-            job["status"] = "转录中..."
-            time.sleep(2)
+            file_paths = [resolve_media_path(path) for path in request.get('files', [])]
+            folder = request.get('folder')
+            if folder:
+                folder = resolve_media_path(folder)
+                if folder is not None:
+                    file_paths.extend(
+                        resolve_media_path(os.path.join(folder, name)) for name in sorted(os.listdir(folder))
+                        if os.path.splitext(name)[1].lower() in MEDIA_EXTENSIONS
+                    )
+                else:
+                    file_paths.append(None)
             
-            # 这里应该调用真实的转录逻辑
-            # result = transcriber.transcribe_file(file_path)
+            if None in file_paths:
+                self.send_error(403, explain="路径不在媒体目录内")
+                return
             
-            # 模拟结果
-            result = {
-                "success": True,
-                "text": "这是一个模拟的转录结果。在实际部署中，这里会显示真实的中文转录内容。系统已经为您的RTX 3060 Ti显卡进行了优化。",
-                "segments": [
-                    {"start": 0, "end": 5, "text": "这是一个模拟的转录结果。"},
-                    {"start": 5, "end": 10, "text": "在实际部署中，这里会显示真实的中文转录内容。"},
-                    {"start": 10, "end": 15, "text": "系统已经为您的RTX 3060 Ti显卡进行了优化。"}
-                ]
-            }
+            if not file_paths:
+                self.send_json_response({"success": False, "error": "没有需要转录的文件"}, allow_cors=False)
+                return
             
-            job["progress"] = 100
-            job["status"] = "完成"
-            job["finished"] = True
-            job["success"] = True
-            job["result"] = result
+            self.send_json_response({"success": True, "job_ids": submit_batch(file_paths)}, allow_cors=False)
             
         except Exception as e:
-            job["finished"] = True
-            job["success"] = False
-            job["error"] = str(e)
-            logger.error(f"转录失败: {e}")
+            logger.error(f"批量任务创建失败: {e}")
+            self.close_connection = True
+            self.send_json_response({"success": False, "error": str(e)}, allow_cors=False)
+    
+    def receive_upload(self):
+        """把multipart中的file字段流式写入临时文件，返回(路径, 原文件名)"""
+        with tempfile.NamedTemporaryFile(delete=False, suffix='.upload') as f:
+            file_path = f.name
+        
+        target = FileTarget(file_path)
+        parser = StreamingFormDataParser(headers={'Content-Type': self.headers['Content-Type']})
+        parser.register('file', target)
+        
+        try:
+            remaining = int(self.headers.get('Content-Length', 0))
+            while remaining > 0:
+                chunk = self.rfile.read(min(remaining, UPLOAD_CHUNK_SIZE))
+                if not chunk:
+                    break
+                parser.data_received(chunk)
+                remaining -= len(chunk)
+        except Exception:
+            os.unlink(file_path)
+            raise
+        
+        return file_path, target.multipart_filename
     
-    def send_json_response(self, data):
+    def process_upload(self, job_id, file_path):
+        """处理上传的文件"""
+        try:
+            run_job(job_id, file_path)
+        finally:
+            # 解码完成后即可删除上传文件
+            os.unlink(file_path)
+    
+    def send_json_response(self, data, allow_cors=True):
         """发送JSON响应"""
-        json_data = json.dumps(data, ensure_ascii=False, indent=2)
+        if ORJSON_AVAILABLE:
+            body = orjson.dumps(data)
+        else:
+            body = json.dumps(data, ensure_ascii=False, separators=(',', ':'), default=_json_default).encode('utf-8')
         
         self.send_response(200)
         self.send_header('Content-type', 'application/json; charset=utf-8')
-        self.send_header('Access-Control-Allow-Origin', '*')
+        self.send_header('Content-Length', str(len(body)))
+        if allow_cors:
+            self.send_header('Access-Control-Allow-Origin', '*')
         self.end_headers()
-        self.wfile.write(json_data.encode('utf-8'))
+        self.wfile.write(body)
 
 def main():
     """主函数"""
-    print("=" * 60)
-    print("🎬 Windows RTX 3060 Ti 中文电视剧转录系统")
-    print("=" * 60)
-    print()
+    # 启动信息先写入缓冲区，再一次性输出，避免Windows控制台逐行刷新
+    out = io.StringIO()
+    print("=" * 60, file=out)
+    print("🎬 Windows RTX 3060 Ti 中文电视剧转录系统", file=out)
+    print("=" * 60, file=out)
+    print(file=out)
     
     # 检查依赖
-    print("🔍 检查系统依赖...")
-    deps = check_dependencies()
+    global _DEPS
+    
+    print("🔍 检查系统依赖...", file=out)
+    deps = _DEPS = check_dependencies()
     
     for name, status in deps.items():
         icon = "✅" if status else "❌"
-        print(f"  {icon} {name}: {'已安装' if status else '缺失'}")
+        print(f"  {icon} {name}: {'已安装' if status else '缺失'}", file=out)
     
     if not deps['python']:
-        print("\n❌ Python版本过低，需要3.8+")
+        print("\n❌ Python版本过低，需要3.8+", file=out)
+        _write_console(out)
         return
     
     if not deps['torch']:
-        print("\n⚠️  PyTorch未安装或GPU不可用")
-        print("请运行: pip install torch torchvision torchaudio --index-url https://download.pytorch.org/whl/cu121")
+        print("\n⚠️  PyTorch未安装或GPU不可用", file=out)
+        print("请运行: pip install torch torchvision torchaudio --index-url https://download.pytorch.org/whl/cu121", file=out)
     
     if not deps['whisper']:
-        print("\n⚠️  Whisper未安装")
-        print("请运行: pip install openai-whisper")
+        print("\n⚠️  Whisper未安装", file=out)
+        print("请运行: pip install openai-whisper", file=out)
     
-    print()
-    print("🚀 启动Web服务器...")
+    print(file=out)
+    print("🚀 启动Web服务器...", file=out)
     
     # 启动HTTP服务器
     port = 8080
-    server = HTTPServer(('localhost', port), TranscriberHandler)
+    start_model_server()
+    server = ThreadingHTTPServer(('localhost', port), TranscriberHandler)
     
-    print(f"✅ 服务已启动: http://localhost:{port}")
-    print("🌐 正在打开浏览器...")
-    print()
-    print("按 Ctrl+C 停止服务")
-    print("=" * 60)
+    print(f"✅ 服务已启动: http://localhost:{port}", file=out)
+    print("🌐 正在打开浏览器...", file=out)
+    print(file=out)
+    print("按 Ctrl+C 停止服务", file=out)
+    print("=" * 60, file=out)
+    _write_console(out)
     
-    # 自动打开浏览器
-    threading.Timer(2, lambda: webbrowser.open(f'http://localhost:{port}')).start()
+    # 构造完成时端口已在监听，可以立即打开浏览器
+    threading.Thread(target=webbrowser.open, args=(f'http://localhost:{port}',), daemon=True).start()
     
     try:
         server.serve_forever()
     except KeyboardInterrupt:
         print("\n\n👋 服务已停止")
         server.shutdown()
+        _MODEL_SERVER.shutdown(wait=False)
+
+def _write_console(out):
+    """一次性写出缓冲的控制台输出"""
+    sys.stdout.write(out.getvalue())
+    sys.stdout.flush()
 
 if __name__ == "__main__":
     main()
\ No newline at end of file